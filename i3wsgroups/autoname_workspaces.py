@@ -6,50 +6,112 @@
 from __future__ import annotations
 
 import argparse
-import logging
-import logging.handlers
+import asyncio
 import os.path
-import pprint
+from typing import Optional, Set, Tuple
 
 import i3ipc
+import i3ipc.aio
 import i3ipc.events
 
 from i3wsgroups import cli_util
 from i3wsgroups import controller
 from i3wsgroups import i3_proxy
+from i3wsgroups import icons
 from i3wsgroups import log_util
 from i3wsgroups import workspace_names
 
 init_logger = log_util.init_logger
 logger = log_util.logger
 
+# Opening or closing a window usually emits a burst of i3 events. Updates are
+# delayed by this interval so that a burst results in a single rename pass.
+_UPDATE_DEBOUNCE_SECONDS = 0.03
+
+
+def _get_workspaces_signature(groups_controller: controller.WorkspaceGroupsController) -> Tuple:
+    # The workspace names determine the groups and numbers, and the properties
+    # of the windows that the icon rules can match determine the icons.
+    # Workspaces in other monitors are also included since they affect the
+    # local numbers.
+    workspaces_signature = tuple(
+        (workspace.name,
+         tuple((window.window_class, window.window_instance, window.window_title)
+               for window in workspace.leaves()))
+        for workspace in groups_controller.get_tree().workspaces())
+    return (groups_controller.i3_proxy.get_focused_monitor_name(), workspaces_signature)
+
 
 class WorkspaceAutonamer:
 
-    def __init__(self, config, dry_run: bool = True):
+    def __init__(self, config, i3_connection: i3ipc.Connection, dry_run: bool = True):
         self.dry_run = dry_run
         self.config = config
+        self.icons_resolver = icons.IconsResolver(config['icons'])
+        # The controller code is synchronous, so it uses a regular connection
+        # from a worker thread, while the events are received using an asyncio
+        # connection.
+        self.i3_connection = i3_connection
+        self._update_lock = asyncio.Lock()
+        self._update_handle: Optional[asyncio.TimerHandle] = None
+        self._update_tasks: Set[asyncio.Task] = set()
+        # Signature of the workspaces after the last update, used to skip
+        # updates when nothing changed.
+        self._last_signature: Tuple = ()
 
     def create_controller(self,
                           i3_connection: i3ipc.Connection) -> controller.WorkspaceGroupsController:
         return controller.WorkspaceGroupsController(i3_proxy.I3Proxy(i3_connection, self.dry_run),
-                                                    self.config)
+                                                    self.config, self.icons_resolver)
 
     def update_workspace_names(self, i3_connection: i3ipc.Connection) -> None:
         groups_controller = self.create_controller(i3_connection)
+        if _get_workspaces_signature(groups_controller) == self._last_signature:
+            logger.debug('Workspaces did not change since the last update, skipping')
+            return
         group_to_workspaces = workspace_names.get_group_to_workspaces(
             groups_controller.i3_proxy.get_monitor_workspaces())
-        groups_controller.organize_workspace_groups(list(group_to_workspaces.items()))
-
-    def window_event_handler(self, i3_connection: i3ipc.Connection,
-                             event: i3ipc.events.IpcBaseEvent) -> None:
+        # The renames are sent when the batch exits, which resets the cached
+        # tree. The signature is computed before that from the workspace
+        # objects, which are updated with their new names. That way no new tree
+        # is fetched, and changes made during the update aren't included, so
+        # they're handled by the next update.
+        with groups_controller.i3_proxy.batch():
+            groups_controller.organize_workspace_groups(group_to_workspaces.items())
+            signature = _get_workspaces_signature(groups_controller)
+        self._last_signature = signature
+
+    async def run_update(self) -> None:
+        # Updates are serialized so that concurrent updates don't rename the
+        # same workspaces based on stale trees.
+        async with self._update_lock:
+            await asyncio.to_thread(self.update_workspace_names, self.i3_connection)
+
+    def _start_update(self) -> None:
+        self._update_handle = None
+        task = asyncio.ensure_future(self.run_update())
+        # Keep a reference to the task so that it's not garbage collected
+        # before it's done.
+        self._update_tasks.add(task)
+        task.add_done_callback(self._update_tasks.discard)
+
+    def schedule_update(self) -> None:
+        # No need to buffer the events: the update queries the i3 tree when the
+        # timer fires, so it sees the result of all the events in the burst.
+        if self._update_handle is not None:
+            self._update_handle.cancel()
+        self._update_handle = asyncio.get_running_loop().call_later(_UPDATE_DEBOUNCE_SECONDS,
+                                                                    self._start_update)
+
+    async def window_event_handler(self, _: i3ipc.aio.Connection,
+                                   event: i3ipc.events.IpcBaseEvent) -> None:
         assert isinstance(event, i3ipc.WindowEvent)
         logger.debug('Got window event with change: %s', event.change)
         if event.change in ['new', 'close', 'move']:
-            self.update_workspace_names(i3_connection)
+            self.schedule_update()
 
-    def workspace_event_handler(self, i3_connection: i3ipc.Connection,
-                                event: i3ipc.events.IpcBaseEvent):
+    async def workspace_event_handler(self, _: i3ipc.aio.Connection,
+                                      event: i3ipc.events.IpcBaseEvent) -> None:
         assert isinstance(event, i3ipc.WorkspaceEvent)
         logger.debug('Got workspace event with change: %s', event.change)
         # We must update the workspace names on a focus event because the
@@ -58,7 +120,16 @@ class WorkspaceAutonamer:
         # next group becomes active, so the icons should be restored to the
         # workspace names.
         if event.change == 'focus':
-            self.update_workspace_names(i3_connection)
+            self.schedule_update()
+
+
+async def _run_autonamer(config, dry_run: bool) -> None:
+    autonamer = WorkspaceAutonamer(config, i3ipc.Connection(), dry_run)
+    await autonamer.run_update()
+    i3 = await i3ipc.aio.Connection().connect()
+    i3.on(i3ipc.Event.WINDOW, autonamer.window_event_handler)
+    i3.on(i3ipc.Event.WORKSPACE_FOCUS, autonamer.workspace_event_handler)
+    await i3.main()
 
 
 def main():
@@ -69,17 +140,12 @@ def main():
     cli_util.add_workspace_naming_args(parser)
     args = parser.parse_args()
     init_logger(os.path.basename(__file__))
-    logger.setLevel(getattr(logging, args.log_level.upper(), 'WARNING'))
+    logger.setLevel(cli_util.LOG_LEVELS[args.log_level])
 
     config = cli_util.get_config_with_overrides(args)
-    logger.debug('Using merged config:\n%s', pprint.pformat(config))
-
-    autonamer = WorkspaceAutonamer(config, args.dry_run)
-    i3_connection = i3ipc.Connection()
-    autonamer.update_workspace_names(i3_connection)
-    i3_connection.on(i3ipc.Event.WINDOW, autonamer.window_event_handler)
-    i3_connection.on(i3ipc.Event.WORKSPACE_FOCUS, autonamer.workspace_event_handler)
-    i3_connection.main()
+    cli_util.log_config(config)
+
+    asyncio.run(_run_autonamer(config, args.dry_run))
 
 
 if __name__ == '__main__':
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 import argparse
-import logging
+import json
+import operator
 import os.path
-import pprint
 import sys
+from typing import Optional
 
 import i3ipc
 
@@ -22,6 +23,12 @@ _LIST_WORKSPACES_FIELDS = workspace_names.WORKSPACE_NAME_SECTIONS + [
 _LIST_WORKSPACES_FIELDS_HELP = ('Comma separated list of fields to output. '
                                 f'Options: {", ".join(_LIST_WORKSPACES_FIELDS)}')
 
+# Requests to the server are the command line arguments separated by newlines
+# and terminated by a null char, which can't appear in arguments. Longer
+# requests are ignored.
+_SERVER_REQUEST_TERMINATOR = b'\0'
+_MAX_SERVER_REQUEST_SIZE = 10000
+
 init_logger = log_util.init_logger
 logger = log_util.logger
 
@@ -53,6 +60,10 @@ def _add_list_workspaces_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('--focused-monitor-only',
                         action='store_true',
                         help='List only workspaces on the current monitor.')
+    parser.add_argument('--json',
+                        action='store_true',
+                        help='Output a JSON list of objects mapping the fields to their values, '
+                        'so that scripts can get all the fields with a single command.')
 
 
 def _add_rename_workspace_args(parser: argparse.ArgumentParser) -> None:
@@ -171,23 +182,50 @@ def _create_group_context(args):
     return None
 
 
-def _get_workspace_field(controller, workspace, field):
-    if field == 'global_name':
-        return workspace.name
-    if field == 'focused':
-        return 1 if workspace.find_focused() is not None else 0
-    if field == 'monitor':
-        con = workspace
-        while con.type != 'output':
-            con = con.parent
-        return con.name
-    if field == 'window_icons':
-        return controller.icons_resolver.get_workspace_icons(workspace)
-    parsed_name = workspace_names.parse_name(workspace.name)
-    value = getattr(parsed_name, field)
-    if value is None:
-        return ''
-    return value
+def _get_workspace_monitor(workspace):
+    con = workspace
+    while con.type != 'output':
+        con = con.parent
+    return con.name
+
+
+def _create_parsed_name_getter(field):
+
+    # Missing sections are None, which is output as an empty string in the
+    # table and as null in JSON.
+    def get_parsed_name_field(_, __, parsed_name):
+        return getattr(parsed_name, field)
+
+    return get_parsed_name_field
+
+
+def _get_focused_workspace_id(tree):
+    focused = tree.find_focused()
+    if focused is None:
+        return None
+    return focused.workspace().id
+
+
+def _create_focused_getter(focused_workspace_id):
+    # The focused workspace is found once from the tree root instead of
+    # searching the subtree of every workspace.
+    return lambda _, workspace, __: 1 if workspace.id == focused_workspace_id else 0
+
+
+# Maps a workspace field to a function that returns its value given the
+# controller, the workspace, and its parsed name.
+_WORKSPACE_FIELD_GETTERS = {
+    'global_name':
+        lambda _, workspace, __: workspace.name,
+    'monitor':
+        lambda _, workspace, __: _get_workspace_monitor(workspace),
+    'window_icons':
+        (lambda controller, workspace, _: controller.icons_resolver.get_workspace_icons(workspace)),
+}
+_WORKSPACE_FIELD_GETTERS.update({
+    section: _create_parsed_name_getter(section)
+    for section in workspace_names.WORKSPACE_NAME_SECTIONS
+})
 
 
 def _print_workspaces(controller, args):
@@ -196,24 +234,107 @@ def _print_workspaces(controller, args):
         if field not in _LIST_WORKSPACES_FIELDS:
             sys.exit(f'Invalid field: "{field}". Valid fields: '
                      f'{_LIST_WORKSPACES_FIELDS}')
+    field_getters = dict(_WORKSPACE_FIELD_GETTERS)
+    if 'focused' in fields:
+        field_getters['focused'] = _create_focused_getter(
+            _get_focused_workspace_id(controller.get_tree()))
+    getters = [field_getters[field] for field in fields]
     table = []
     for workspace in controller.list_workspaces(_create_group_context(args), args.focused_only,
                                                 args.focused_monitor_only):
-        row = []
-        for field in fields:
-            row.append(_get_workspace_field(controller, workspace, field))
-        table.append(row)
-    return '\n'.join('\t'.join(str(e) for e in row) for row in table)
+        parsed_name = workspace_names.parse_name(workspace.name)
+        table.append([getter(controller, workspace, parsed_name) for getter in getters])
+    if args.json:
+        return json.dumps([dict(zip(fields, row)) for row in table], ensure_ascii=False)
+    return '\n'.join('\t'.join('' if e is None else str(e) for e in row) for row in table)
+
+
+def _handle_server_request(i3_connection, parser: cli_util.ArgumentParserNoExit,
+                           data: bytes) -> Optional[str]:
+    try:
+        client_argv = [s.decode('utf-8') for s in data.split(b'\n')]
+    except UnicodeError:
+        logger.warning('Failed decoding command args as utf-8')
+        return None
+    logger.info(f'Argv from client: {client_argv}')
+    try:
+        client_args = parser.parse_args(client_argv)
+        if client_args.command == 'server':
+            logger.warning('Ignoring nested server command')
+            return None
+        return run_command(i3_connection, client_args)
+    # argparse can raise SystemExit, but we use a wrapper over
+    # ArgumentParser to avoid it.
+    except argparse.ArgumentError as e:
+        msg = f'error: failed parsing command: {e}'
+        logger.warning(msg)
+        return msg
+    except cli_util.ExitCalledError as e:
+        msg = e.message or ''
+        if e.status == 0 and not msg:
+            msg = e.parser.format_help()
+        elif e.status != 0:
+            msg = f'error: {msg}'
+        logger.warning(msg)
+        return msg
+
+
+async def _read_server_request(reader) -> Optional[bytes]:
+    # pylint: disable-next=import-outside-toplevel
+    import asyncio
+    try:
+        data = await reader.readuntil(_SERVER_REQUEST_TERMINATOR)
+    except asyncio.IncompleteReadError as e:
+        # Older clients don't send the terminator and only close their side of
+        # the connection.
+        return e.partial
+    except asyncio.LimitOverrunError:
+        logger.warning('Skipping unusually long command')
+        return None
+    return data[:-len(_SERVER_REQUEST_TERMINATOR)]
+
+
+async def _handle_server_client(i3_connection, parser: cli_util.ArgumentParserNoExit, reader,
+                                writer) -> None:
+    logger.debug('Got a connection')
+    try:
+        data = await _read_server_request(reader)
+        if data is None:
+            return
+        # Commands are run synchronously in the event loop, so they are
+        # serialized, but a slow client no longer blocks other clients.
+        output = _handle_server_request(i3_connection, parser, data)
+        if output is not None:
+            writer.write(output.encode('utf-8'))
+            await writer.drain()
+    except ConnectionError:
+        # The client may have disconnected, so ignore the error.
+        logger.warning('Failed sending output to client')
+    finally:
+        # Clean up the connection
+        writer.close()
+
+
+async def _serve_forever(i3_connection, server_addr) -> None:
+    # pylint: disable-next=import-outside-toplevel
+    import asyncio
+
+    # Building the parser is relatively slow, so it's done once and shared by
+    # all requests. Parsing arguments doesn't modify the parser.
+    parser = _create_args_parser()
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _handle_server_client(i3_connection, parser, reader, writer),
+        path=server_addr,
+        limit=_MAX_SERVER_REQUEST_SIZE)
+    async with server:
+        await server.serve_forever()
 
 
-# pylint: disable-next=too-many-statements
 def serve(i3_connection, server_addr):
     # Add the imports here to avoid having a negative effect on clients not
     # using the server.
     # pylint: disable-next=import-outside-toplevel
-    # import shlex
-    # pylint: disable-next=import-outside-toplevel
-    import socket
+    import asyncio
 
     # Make sure the socket does not already exist
     # TODO: lock the socket to avoid multiple servers trying to use the same
@@ -223,110 +344,65 @@ def serve(i3_connection, server_addr):
     except OSError:
         if os.path.exists(server_addr):
             raise
-    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    sock.bind(server_addr)
-    sock.listen(1)
-    while True:
-        parser = _create_args_parser()
-        logger.debug('Waiting for a connection')
-        connection, addr = sock.accept()
-        logger.debug(f'Connection from: {addr}')
-        data = connection.recv(10000)
-        if len(data) == 10000:
-            logger.warning('Skipping unusually long command')
-            continue
-        try:
-            client_argv = [s.decode('utf-8') for s in data.split(b'\n')]
-        except UnicodeError:
-            logger.warning('Failed decoding command args as utf-8')
-            continue
-        logger.info(f'Argv from client: {client_argv}')
-        try:
-            client_args = parser.parse_args(client_argv)
-            if client_args.command == 'server':
-                logger.warning('Ignoring nested server command')
-                continue
-            output = run_command(i3_connection, client_args)
-            connection.sendall(output.encode('utf-8'))
-        # argparse can raise SystemExit, but we use a wrapper over
-        # ArgumentParser to avoid it.
-        except argparse.ArgumentError as e:
-            msg = f'error: failed parsing command: {e}'
-            logger.warning(msg)
-            connection.sendall(msg.encode('utf-8'))
-            continue
-        except cli_util.ExitCalledError as e:
-            msg = e.message or ''
-            if e.status == 0 and not msg:
-                msg = e.parser.format_help()
-            elif e.status != 0:
-                msg = f'error: {msg}'
-            logger.warning(msg)
-            try:
-                connection.sendall(msg.encode('utf-8'))
-            except BrokenPipeError:
-                # The client may have disconnected, so ignore the error.
-                logger.warning('Failed sending error message to client')
-            continue
-        finally:
-            # Clean up the connection
-            connection.close()
+    asyncio.run(_serve_forever(i3_connection, server_addr))
+
+
+def get_monitor_active_group(groups_to_workspaces, monitor, workspace_to_monitor):
+    # The active group is the group of the workspace with the lowest global
+    # number in the monitor.
+    group_and_global_numbers = ((group, workspace_names.parse_name(ws.name).global_number)
+                                for group, workspaces in groups_to_workspaces.items()
+                                for ws in workspaces
+                                if not monitor or workspace_to_monitor[ws.id] == monitor)
+    return min((group_and_global_number for group_and_global_number in group_and_global_numbers
+                if group_and_global_number[1]),
+               key=operator.itemgetter(1),
+               default=('', 0))[0]
+
 
+# Format polybar text with an overline or underline of the given color, or
+# return it unchanged if no color is given.
+def _format_polybar_overline(text, color):
+    return f'%{{o{color}}}%{{+o}}{text}%{{-o}}' if color else text
 
-def get_monitor_active_group(controller, groups_to_workspaces, monitor):
-    active_group = ''
-    min_global = float('inf')
-    for (group, workspaces) in groups_to_workspaces.items():
-        for ws in workspaces:
-            if not monitor or _get_workspace_field(controller, ws, 'monitor') == monitor:
-                global_number = _get_workspace_field(controller, ws, 'global_number')
-                if global_number and global_number < min_global:
-                    active_group = group
-                    min_global = global_number
-    return active_group
+
+def _format_polybar_underline(text, color):
+    return f'%{{u{color}}}%{{+u}}{text}%{{-u}}' if color else text
 
 
 def _print_polybar_hook(controller, args):
     # Grab information about the i3 workspace states
-    workspaces = controller.get_tree().workspaces()
+    tree = controller.get_tree()
+    workspaces = tree.workspaces()
     group_to_workspaces = workspace_names.get_group_to_workspaces(workspaces)
-    active_group = get_monitor_active_group(controller, group_to_workspaces, args.monitor)
-
-    # Lambdas for formatting polybar text with overline and underline
-    def polybar_overline_format(text, color):
-        return f'%{{o{color}}}%{{+o}}{text}%{{-o}}' if color else text
-
-    def polybar_underline_format(text, color):
-        return f'%{{u{color}}}%{{+u}}{text}%{{-u}}' if color else text
+    # Computed once since it's used for every workspace and group.
+    workspace_to_monitor = {ws.id: _get_workspace_monitor(ws) for ws in workspaces}
+    focused_workspace_id = _get_focused_workspace_id(tree)
+    active_group = get_monitor_active_group(group_to_workspaces, args.monitor, workspace_to_monitor)
 
     formatted_group_info = []
 
     for group in sorted(group_to_workspaces.keys()):
-        workspaces = group_to_workspaces[group]
-
-        # Build parsed_names_dict to include the local numbers of the workspaces
-        # relevant to this monitor and group
-        parsed_names_dict = {}
-        for ws in workspaces:
-            # When monitor is specified, only include workspaces
-            # on that monitor. Otherwise, include all workspaces.
-            if not args.monitor or _get_workspace_field(controller, ws, 'monitor') == args.monitor:
-                local_number = _get_workspace_field(controller, ws, 'local_number')
-                focused = _get_workspace_field(controller, ws, 'focused')
-                parsed_names_dict[local_number] = {'focused': focused}
-
-        if parsed_names_dict:
-            parsed_names = ''.join([
-                polybar_underline_format(
-                    f" {local_number} ",
-                    args.line_color if parsed_names_dict[local_number]['focused'] else None)
-                for local_number in sorted(parsed_names_dict.keys())
-            ])
-
-            formatted_group = polybar_overline_format(
-                f"{group}:", args.line_color if active_group == group else None)
-
-            formatted_group_info.append(f'{formatted_group}{parsed_names}')
+        # Maps the local numbers of the group workspaces to whether they're
+        # focused. Each local number is shown once.
+        # When monitor is specified, only include workspaces on that monitor.
+        # Otherwise, include all workspaces.
+        number_to_focused = {
+            workspace_names.parse_name(ws.name).local_number or '': ws.id == focused_workspace_id
+            for ws in group_to_workspaces[group]
+            if not args.monitor or workspace_to_monitor[ws.id] == args.monitor
+        }
+        if not number_to_focused:
+            continue
+        group_parts = [
+            _format_polybar_overline(f'{group}:',
+                                     args.line_color if active_group == group else None)
+        ]
+        for local_number, focused in sorted(number_to_focused.items()):
+            group_parts.append(
+                _format_polybar_underline(f' {local_number} ',
+                                          args.line_color if focused else None))
+        formatted_group_info.append(''.join(group_parts))
 
     # Print each of the formatted group infos
     # separated by pipes.
@@ -341,7 +417,7 @@ def _print_polybar_hook(controller, args):
 # pylint: disable-next=no-else-return
 def run_command(i3_connection, args):
     config = cli_util.get_config_with_overrides(args)
-    logger.debug('Using merged config:\n%s', pprint.pformat(config))
+    cli_util.log_config(config)
     controller = i3_groups_controller.WorkspaceGroupsController(
         i3_proxy.I3Proxy(i3_connection, args.dry_run), config)
     if args.command == 'list-groups':
@@ -401,7 +477,7 @@ def main():
             sys.stderr.write(f'{e.message}\n')
         sys.exit(e.status)
     init_logger(os.path.basename(__file__))
-    logger.setLevel(getattr(logging, args.log_level.upper(), 'WARNING'))
+    logger.setLevel(cli_util.LOG_LEVELS[args.log_level])
     i3_connection = i3ipc.Connection()
     try:
         output = run_command(i3_connection, args)
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
 import argparse
+import logging
 import typing as t
 
 from i3wsgroups import config
+from i3wsgroups.log_util import logger
+
+LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
 
 
 class ExitCalledError(Exception):
@@ -35,7 +45,7 @@ def add_common_args(parser: argparse.ArgumentParser):
                         default=False,
                         help='If true, only log what changed would be done.')
     parser.add_argument('--log-level',
-                        choices=('debug', 'info', 'warning', 'error', 'critical'),
+                        choices=tuple(LOG_LEVELS),
                         default='warning',
                         help='Logging level for stderr and syslog.')
 
@@ -70,3 +80,13 @@ def get_config_with_overrides(args: argparse.Namespace):
     if args.window_icons_all_groups is not None:
         config_dict['icons']['enable_all_groups'] = args.window_icons_all_groups
     return config_dict
+
+
+def log_config(config_dict) -> None:
+    # Formatting the config is relatively slow and done for every command, so
+    # it's skipped unless it will be logged.
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    # pylint: disable-next=import-outside-toplevel
+    import pprint
+    logger.debug('Using merged config:\n%s', pprint.pformat(config_dict))
@@ -1,40 +1,98 @@
+import collections.abc
+import copy
+import functools
 import os
+import pathlib
+import types
 
-import toml
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
 
-DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'default_config.toml')
+from i3wsgroups.default_config import DEFAULT_CONFIG
+
+DEFAULT_CONFIG_PATH = pathlib.Path(__file__).with_name('default_config.toml')
 XDG_CONFIG_HOME = os.environ.get('XDG_CONFIG_HOME', os.path.expandvars('$HOME/.config'))
-CONFIG_PATH = os.path.join(XDG_CONFIG_HOME, 'i3-workspace-groups', 'config.toml')
+CONFIG_PATH = pathlib.Path(XDG_CONFIG_HOME, 'i3-workspace-groups', 'config.toml')
 
 
 class ConfigError(Exception):
     pass
 
 
+def _deep_freeze(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: _deep_freeze(v) for key, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_deep_freeze(v) for v in value)
+    return value
+
+
+# The default config is shared by all the merged configs, so it's frozen to
+# make sure it's never modified.
+_FROZEN_DEFAULT_CONFIG = _deep_freeze(DEFAULT_CONFIG)
+
+
 def merge_config(merge_from, merge_into):
-    for key, value in merge_from.items():
-        if isinstance(value, list):
-            continue
-        if isinstance(value, dict):
-            if key not in merge_into:
-                merge_into[key] = type(value)()
-            merge_config(value, merge_into[key])
-        elif key not in merge_into:
-            merge_into[key] = value
+    # Uses an explicit stack of (merge_from, merge_into) dicts instead of
+    # recursion.
+    stack = [(merge_from, merge_into)]
+    while stack:
+        src, dst = stack.pop()
+        for key, value in src.items():
+            if isinstance(value, (list, tuple)):
+                continue
+            if isinstance(value, collections.abc.Mapping):
+                if key not in dst:
+                    dst[key] = {}
+                stack.append((value, dst[key]))
+            elif key not in dst:
+                dst[key] = value
+
+
+# The server and the autonamer load the config for every command, so parsed
+# config files are cached. The mtime is part of the cache key so that a
+# modified file is parsed again.
+@functools.lru_cache(maxsize=8)
+def _load_toml_cached(path, mtime_ns):  # pylint: disable=unused-argument
+    # Config files are small, so they're read in a single call and parsed
+    # from memory.
+    with open(path, 'rb') as f:
+        data = f.read()
+    return tomllib.loads(data.decode('utf-8'))
+
+
+def _load_toml(path, mtime_ns):
+    # The returned config is modified by the caller, so it must not be the
+    # cached one.
+    return copy.deepcopy(_load_toml_cached(path, mtime_ns))
+
+
+def _get_mtime_ns(path: pathlib.Path):
+    # A single stat call both checks that the file exists and returns the
+    # mtime used as the cache key.
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
 
 
 # TODO: Validate config.
 def get_config_with_defaults(path=CONFIG_PATH, fail_if_missing=False):
-    if fail_if_missing and not os.path.exists(path):
+    path = pathlib.Path(path)
+    mtime_ns = _get_mtime_ns(path)
+    if fail_if_missing and mtime_ns is None:
         raise ConfigError(f'No config file found in {path}')
     config = {}
-    if os.path.exists(path):
-        config = toml.load(path)
-    default_config = toml.load(DEFAULT_CONFIG_PATH)
+    if mtime_ns is not None:
+        config = _load_toml(path, mtime_ns)
+    # merge_config creates new dicts in the merged config, so it doesn't
+    # contain any frozen mappings.
+    default_config = _FROZEN_DEFAULT_CONFIG
     merge_config(default_config, config)
     if config['icons']['try_fallback_rules']:
         if 'rules' not in config['icons']:
             config['icons']['rules'] = []
-        for rule in default_config['icons']['rules']:
-            config['icons']['rules'].append(rule)
+        config['icons']['rules'].extend(dict(rule) for rule in default_config['icons']['rules'])
     return config
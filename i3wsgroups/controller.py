@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
-import copy
-from typing import List, Optional, Tuple
+import dataclasses
+import functools
+import itertools
+from typing import Iterable, List, Optional, Tuple
 
 import i3ipc
 
@@ -15,14 +17,44 @@ from i3wsgroups.log_util import logger
 # from i3wsgroups.ws_names import *
 
 GroupToWorkspaces = ws_names.GroupToWorkspaces
-OrderedWorkspaceGroups = List[Tuple[str, List[i3ipc.Con]]]
+OrderedWorkspaceGroups = Iterable[Tuple[str, List[i3ipc.Con]]]
 
 
 class WorkspaceGroupsError(Exception):
     pass
 
 
+# State of the i3 tree that most commands need. It's created once per command
+# and passed to the helper methods so that they don't walk the tree again. Each
+# value is only computed when it's first used, since most commands only need
+# some of them. It must be used before any command is sent to i3, since that
+# resets the tree cached by the proxy.
+class _Snapshot:
+
+    def __init__(self, i3_proxy_: i3_proxy.I3Proxy):
+        self._i3_proxy = i3_proxy_
+        self.tree = i3_proxy_.get_tree()
+
+    @functools.cached_property
+    def focused_workspace(self) -> i3ipc.Con:
+        return self.tree.find_focused().workspace()
+
+    @functools.cached_property
+    def focused_monitor_name(self) -> str:
+        return self._i3_proxy.get_focused_monitor_name()
+
+    @functools.cached_property
+    def group_to_all_workspaces(self) -> GroupToWorkspaces:
+        return ws_names.get_group_to_workspaces(self.tree.workspaces())
+
+    @functools.cached_property
+    def group_to_monitor_workspaces(self) -> GroupToWorkspaces:
+        return ws_names.get_group_to_workspaces(
+            self._i3_proxy.get_monitor_workspaces(self.focused_monitor_name))
+
+
 class ActiveGroupContext:
+    __slots__ = ()
 
     @staticmethod
     def get_group_name(_: i3ipc.Con, group_to_workspaces: GroupToWorkspaces) -> str:
@@ -31,6 +63,7 @@ class ActiveGroupContext:
 
 
 class FocusedGroupContext:
+    __slots__ = ()
 
     @staticmethod
     def get_group_name(tree: i3ipc.Con, _: GroupToWorkspaces) -> Optional[str]:
@@ -39,6 +72,7 @@ class FocusedGroupContext:
 
 
 class NamedGroupContext:
+    __slots__ = ('group_name',)
 
     def __init__(self, group_name: str):
         self.group_name = group_name
@@ -47,80 +81,114 @@ class NamedGroupContext:
         return self.group_name
 
 
+# The active group context is stateless, so a single instance is shared.
+_ACTIVE_GROUP_CONTEXT = ActiveGroupContext()
+
+
 class WorkspaceGroupsController:
 
-    def __init__(self, i3_proxy_: i3_proxy.I3Proxy, config):
+    def __init__(self,
+                 i3_proxy_: i3_proxy.I3Proxy,
+                 config,
+                 icons_resolver: Optional[icons.IconsResolver] = None):
         self.i3_proxy = i3_proxy_
         self.config = config
-        self.icons_resolver = icons.IconsResolver(self.config['icons'])
+        # Long running processes can share a resolver between controllers so
+        # that its cached window icons are reused.
+        if icons_resolver is not None:
+            self.icons_resolver = icons_resolver
+
+    # Creating the resolver compiles the regexes of all the icon rules, so it's
+    # only done if icons are actually used by the command.
+    @functools.cached_property
+    def icons_resolver(self) -> icons.IconsResolver:
+        return icons.IconsResolver(self.config['icons'])
 
     def get_tree(self, cached: bool = True) -> i3ipc.Con:
         return self.i3_proxy.get_tree(cached)
 
+    def _snapshot(self) -> _Snapshot:
+        return _Snapshot(self.i3_proxy)
+
     def organize_workspace_groups(self,
                                   workspace_groups: OrderedWorkspaceGroups,
-                                  monitor_name: Optional[str] = None) -> None:
+                                  monitor_name: Optional[str] = None,
+                                  snapshot: Optional[_Snapshot] = None) -> None:
+        snapshot = snapshot or self._snapshot()
         if monitor_name is None:
-            monitor_name = self.i3_proxy.get_focused_monitor_name()
+            monitor_name = snapshot.focused_monitor_name
         monitor_index = self.i3_proxy.get_monitor_index(monitor_name)
-        group_to_all_workspaces = ws_names.get_group_to_workspaces(self.get_tree().workspaces())
-        for group_index, (group, workspaces) in enumerate(workspace_groups):
-            logger.debug('Organizing workspace group: "%s" in monitor "%s"', group, monitor_name)
-            local_numbers = ws_names.compute_local_numbers(workspaces,
-                                                           group_to_all_workspaces.get(group, []),
-                                                           self.config['renumber_workspaces'])
-            for workspace, local_number in zip(workspaces, local_numbers):
-                ws_metadata = ws_names.parse_name(workspace.name)
-                ws_metadata.group = group
-                ws_metadata.local_number = local_number
-                ws_metadata.global_number = ws_names.compute_global_number(
-                    monitor_index, group_index, local_number)
-                dynamic_name = ''
+        group_to_all_workspaces = snapshot.group_to_all_workspaces
+        icons_config = self.config['icons']
+        renumber_workspaces = self.config['renumber_workspaces']
+        # The renames are sent to i3 in a single message.
+        with self.i3_proxy.batch():
+            for group_index, (group, workspaces) in enumerate(workspace_groups):
+                logger.debug('Organizing workspace group: "%s" in monitor "%s"', group,
+                             monitor_name)
+                local_numbers = ws_names.compute_local_numbers(
+                    workspaces, group_to_all_workspaces.get(group, []), renumber_workspaces)
                 # Add window icons if needed.
-                if self.config['icons']['enable'] and (self.config['icons']['enable_all_groups'] or
-                                                       group_index == 0):
-                    dynamic_name = self.icons_resolver.get_workspace_icons(workspace)
-                ws_metadata.dynamic_name = dynamic_name
-                new_name = ws_names.create_name(ws_metadata)
-                self.i3_proxy.rename_workspace(workspace.name, new_name)
-                workspace.name = new_name
+                add_icons = icons_config['enable'] and (icons_config['enable_all_groups'] or
+                                                        group_index == 0)
+                for workspace, local_number in zip(workspaces, local_numbers):
+                    dynamic_name = ''
+                    if add_icons:
+                        dynamic_name = self.icons_resolver.get_workspace_icons(workspace)
+                    # The static name is the only section kept from the
+                    # current name.
+                    new_name = ws_names.create_name(
+                        ws_names.WorkspaceGroupingMetadata(
+                            global_number=ws_names.compute_global_number(
+                                monitor_index, group_index, local_number),
+                            group=group,
+                            static_name=ws_names.parse_name(workspace.name).static_name,
+                            dynamic_name=dynamic_name,
+                            local_number=local_number))
+                    self.i3_proxy.rename_workspace(workspace.name, new_name)
+                    workspace.name = new_name
 
     def list_groups(self, monitor_only: bool = False) -> List[str]:
-        workspaces = self.get_tree().workspaces()
         if monitor_only:
             workspaces = self.i3_proxy.get_monitor_workspaces()
-        group_to_workspaces = ws_names.get_group_to_workspaces(workspaces)
-        return list(group_to_workspaces.keys())
+        else:
+            workspaces = self.get_tree().workspaces()
+        # Only the group names are needed, so the workspaces are not grouped.
+        return list(dict.fromkeys(ws_names.get_group(workspace) for workspace in workspaces))
 
     def list_workspaces(self,
                         group_context,
                         focused_only: bool = False,
                         monitor_only: bool = False) -> List[i3ipc.Con]:
-        workspaces = self.get_tree().workspaces()
+        tree = self.get_tree()
         if monitor_only:
             workspaces = self.i3_proxy.get_monitor_workspaces()
+        else:
+            workspaces = tree.workspaces()
         group_to_workspaces = ws_names.get_group_to_workspaces(workspaces)
+        group_name = None
+        if group_context:
+            group_name = group_context.get_group_name(tree, group_to_workspaces)
+        if focused_only:
+            # The focused workspace is always in the focused monitor, so it's
+            # listed if and only if it's in the context group.
+            focused_workspace = tree.find_focused().workspace()
+            if group_context and ws_names.get_group(focused_workspace) != group_name:
+                return []
+            return [focused_workspace]
         # If no context group specified, return workspaces from all groups.
         if not group_context:
-            group_workspaces = sum(
-                (list(workspaces) for workspaces in group_to_workspaces.values()), [])
-        else:
-            group_name = group_context.get_group_name(self.get_tree(), group_to_workspaces)
-            group_workspaces = group_to_workspaces.get(group_name, [])
-        if not focused_only:
-            return group_workspaces
-        focused_workspace = self.get_tree().find_focused().workspace()
-        return [ws for ws in group_workspaces if ws.id == focused_workspace.id]
-
-    def _find_free_local_number(self, target_group: str):
-        group_to_all_workspaces = ws_names.get_group_to_workspaces(self.get_tree().workspaces())
+            return list(itertools.chain.from_iterable(group_to_workspaces.values()))
+        return group_to_workspaces.get(group_name, [])
+
+    def _find_free_local_number(self, target_group: str, snapshot: _Snapshot):
         used_local_numbers = ws_names.get_used_local_numbers(
-            group_to_all_workspaces.get(target_group, []))
-        return next(iter(ws_names.get_lowest_free_local_numbers(1, used_local_numbers)))
+            snapshot.group_to_all_workspaces.get(target_group, []))
+        return ws_names.get_lowest_free_local_number(used_local_numbers)
 
-    def _create_new_active_group_workspace_name(self, monitor_name: str,
-                                                target_group: str) -> i3ipc.Con:
-        local_number = self._find_free_local_number(target_group)
+    def _create_new_active_group_workspace_name(self, monitor_name: str, target_group: str,
+                                                snapshot: _Snapshot) -> i3ipc.Con:
+        local_number = self._find_free_local_number(target_group, snapshot)
         global_number = ws_names.compute_global_number(
             monitor_index=self.i3_proxy.get_monitor_index(monitor_name),
             group_index=0,
@@ -130,21 +198,43 @@ class WorkspaceGroupsController:
                                                          local_number=local_number)
         return ws_names.create_name(ws_metadata)
 
-    def switch_monitor_active_group(self, monitor_name: str, target_group: str) -> None:
-        monitor_workspaces = self.i3_proxy.get_monitor_workspaces(monitor_name)
-        group_to_monitor_workspaces = ws_names.get_group_to_workspaces(monitor_workspaces)
-        reordered_group_to_workspaces = [(target_group,
-                                          group_to_monitor_workspaces.get(target_group, []))]
-        for group, workspaces in group_to_monitor_workspaces.items():
-            if group != target_group:
-                reordered_group_to_workspaces.append((group, workspaces))
-        self.organize_workspace_groups(reordered_group_to_workspaces, monitor_name)
+    def switch_monitor_active_group(
+            self,
+            monitor_name: str,
+            target_group: str,
+            snapshot: Optional[_Snapshot] = None,
+            group_to_monitor_workspaces: Optional[GroupToWorkspaces] = None) -> None:
+        if group_to_monitor_workspaces is None:
+            group_to_monitor_workspaces = ws_names.get_group_to_workspaces(
+                self.i3_proxy.get_monitor_workspaces(monitor_name))
+        # The target group becomes the first group, and the other groups keep
+        # their order. The grouping may be shared with the caller, so it's not
+        # modified.
+        other_groups = [(group, workspaces)
+                        for group, workspaces in group_to_monitor_workspaces.items()
+                        if group != target_group]
+        reordered_group_to_workspaces = [
+            (target_group, group_to_monitor_workspaces.get(target_group, []))
+        ] + other_groups
+        self.organize_workspace_groups(reordered_group_to_workspaces, monitor_name, snapshot)
 
     def switch_active_group(self, target_group: str, focused_monitor_only: bool) -> None:
-        focused_monitor_name = self.i3_proxy.get_focused_monitor_name()
-        monitor_to_workspaces = self.i3_proxy.get_monitor_to_workspaces()
-        for monitor, workspaces in monitor_to_workspaces.items():
-            group_exists = target_group in ws_names.get_group_to_workspaces(workspaces)
+        # The renames in all monitors and the focus change are sent to i3 in a
+        # single message.
+        with self.i3_proxy.batch():
+            self._switch_active_group(target_group, focused_monitor_only)
+
+    def _switch_active_group(self, target_group: str, focused_monitor_only: bool) -> None:
+        snapshot = self._snapshot()
+        focused_monitor_name = snapshot.focused_monitor_name
+        # Grouped once per monitor and used both for switching the monitor's
+        # active group and for finding the workspace to focus.
+        monitor_to_group_workspaces = {
+            monitor: ws_names.get_group_to_workspaces(workspaces)
+            for monitor, workspaces in self.i3_proxy.get_monitor_to_workspaces().items()
+        }
+        for monitor, group_to_monitor_workspaces in monitor_to_group_workspaces.items():
+            group_exists = target_group in group_to_monitor_workspaces
             if monitor == focused_monitor_name:
                 logger.debug('Switching active group in focused monitor "%s"', monitor)
             elif not focused_monitor_only and group_exists:
@@ -153,91 +243,98 @@ class WorkspaceGroupsController:
                     'switching to it.', monitor, target_group)
             else:
                 continue
-            self.switch_monitor_active_group(monitor, target_group)
+            self.switch_monitor_active_group(monitor, target_group, snapshot,
+                                             group_to_monitor_workspaces)
         # NOTE: We only switch focus to the new workspace after renaming all the
         # workspaces in all monitors and groups. Otherwise, if the previously
         # focused workspace was renamed, i3's `workspace back_and_forth` will
         # switch focus to a non-existant workspace name.
-        focused_group = ws_names.get_group(self.get_tree().find_focused().workspace())
+        # Renamed workspaces are updated in place, so the snapshot has the new
+        # names.
+        focused_group = ws_names.get_group(snapshot.focused_workspace)
         # The target group is already focused, no need to do anything.
         if focused_group == target_group:
             return
-        group_to_monitor_workspaces = ws_names.get_group_to_workspaces(
-            monitor_to_workspaces[focused_monitor_name])
+        group_to_monitor_workspaces = monitor_to_group_workspaces[focused_monitor_name]
         if target_group in group_to_monitor_workspaces:
             workspace_name = group_to_monitor_workspaces[target_group][0].name
         # The focused monitor doesn't have any workspaces in the target group,
         # so create one.
         else:
             workspace_name = self._create_new_active_group_workspace_name(
-                focused_monitor_name, target_group)
+                focused_monitor_name, target_group, snapshot)
         self.i3_proxy.focus_workspace(workspace_name, auto_back_and_forth=False)
 
-    def _create_workspace_name(self, metadata: ws_names.WorkspaceGroupingMetadata) -> str:
-        focused_monitor_name = self.i3_proxy.get_focused_monitor_name()
+    def _create_workspace_name(self, metadata: ws_names.WorkspaceGroupingMetadata,
+                               snapshot: _Snapshot) -> str:
+        focused_monitor_name = snapshot.focused_monitor_name
         monitor_index = self.i3_proxy.get_monitor_index(focused_monitor_name)
-        group_to_monitor_workspaces = ws_names.get_group_to_workspaces(
-            self.i3_proxy.get_monitor_workspaces(focused_monitor_name))
-        group_index = ws_names.get_group_index(metadata.group, group_to_monitor_workspaces)
-        metadata = copy.deepcopy(metadata)
+        group_index = ws_names.get_group_index(metadata.group, snapshot.group_to_monitor_workspaces)
         local_number = metadata.local_number
         if local_number is None:
             local_number = 1
-        metadata.global_number = ws_names.compute_global_number(monitor_index, group_index,
-                                                                (local_number))
-        return ws_names.create_name(metadata)
+        global_number = ws_names.compute_global_number(monitor_index, group_index, local_number)
+        return ws_names.create_name(dataclasses.replace(metadata, global_number=global_number))
 
     # If there's an existing workspace in the given group with the given local
     # number, return its (name, True). Otherwise, create a name and return
     # (name, False).
-    def _get_workspace_by_local_number(self, group: str, local_number: int) -> Tuple[str, bool]:
+    def _get_workspace_by_local_number(self, group: str, local_number: int,
+                                       snapshot: _Snapshot) -> Tuple[str, bool]:
         # i3 commands like `workspace number n` will focus on an existing
         # workspace in another monitor if possible. To preserve this behavior,
         # we check the group workspaces in all monitors.
-        group_to_all_workspaces = ws_names.get_group_to_workspaces(self.get_tree().workspaces())
         # Every workspace must have a unique (group, local_number) pair. This
         # tracks whether we found a workspace that conflicts with the given
         # (group, local_number).
-        for workspace in group_to_all_workspaces.get(group, []):
+        for workspace in snapshot.group_to_all_workspaces.get(group, []):
             if ws_names.get_local_workspace_number(workspace) == local_number:
                 return workspace.name, True
         return self._create_workspace_name(
-            ws_names.WorkspaceGroupingMetadata(group=group, local_number=local_number)), False
-
-    def _get_group_from_context(self, group_context):
-        group_context = group_context or ActiveGroupContext()
-        focused_monitor_name = self.i3_proxy.get_focused_monitor_name()
-        group_to_monitor_workspaces = ws_names.get_group_to_workspaces(
-            self.i3_proxy.get_monitor_workspaces(focused_monitor_name))
-        target_group = group_context.get_group_name(self.get_tree(), group_to_monitor_workspaces)
+            ws_names.WorkspaceGroupingMetadata(group=group, local_number=local_number),
+            snapshot), False
+
+    def _get_group_from_context(self, group_context, snapshot: _Snapshot):
+        group_context = group_context or _ACTIVE_GROUP_CONTEXT
+        target_group = group_context.get_group_name(snapshot.tree,
+                                                    snapshot.group_to_monitor_workspaces)
         logger.info('Context group: "%s"', target_group)
         return target_group
 
-    def focus_workspace_number(self, group_context, target_local_number: int) -> None:
+    def focus_workspace_number(self,
+                               group_context,
+                               target_local_number: int,
+                               snapshot: Optional[_Snapshot] = None) -> None:
+        snapshot = snapshot or self._snapshot()
         target_workspace_name, _ = self._get_workspace_by_local_number(
-            group=self._get_group_from_context(group_context), local_number=target_local_number)
+            group=self._get_group_from_context(group_context, snapshot),
+            local_number=target_local_number,
+            snapshot=snapshot)
         logger.debug('Derived workspace name: "%s"', target_workspace_name)
         self.i3_proxy.focus_workspace(target_workspace_name)
 
     def move_to_workspace_number(self,
                                  group_context,
                                  target_local_number: int,
-                                 no_auto_back_and_forth: bool = False) -> None:
+                                 no_auto_back_and_forth: bool = False,
+                                 snapshot: Optional[_Snapshot] = None) -> None:
+        snapshot = snapshot or self._snapshot()
         target_workspace_name, _ = self._get_workspace_by_local_number(
-            group=self._get_group_from_context(group_context), local_number=target_local_number)
+            group=self._get_group_from_context(group_context, snapshot),
+            local_number=target_local_number,
+            snapshot=snapshot)
         flags = '--no-auto-back-and-forth' if no_auto_back_and_forth else ''
         self.i3_proxy.send_i3_command(
             f'move {flags} container to workspace "{target_workspace_name}"')
 
     def _relative_workspace_in_group(self, offset_from_current: int = 1) -> i3ipc.Con:
-        focused_workspace = self.get_tree().find_focused().workspace()
+        snapshot = self._snapshot()
+        focused_workspace = snapshot.focused_workspace
         focused_group = ws_names.get_group(focused_workspace)
-        group_workspaces_all_monitors = ws_names.get_group_to_workspaces(
-            self.get_tree().workspaces())[focused_group]
-        current_workspace_index = 0
-        for (current_workspace_index, workspace) in enumerate(group_workspaces_all_monitors):
-            if workspace.id == focused_workspace.id:
-                break
+        group_workspaces_all_monitors = snapshot.group_to_all_workspaces[focused_group]
+        # The snapshot workspaces and the focused workspace are the same
+        # objects, so the index is found with a single identity scan.
+        current_workspace_index = group_workspaces_all_monitors.index(focused_workspace)
         next_workspace_index = (current_workspace_index +
                                 offset_from_current) % len(group_workspaces_all_monitors)
         return group_workspaces_all_monitors[next_workspace_index]
@@ -251,37 +348,44 @@ class WorkspaceGroupsController:
         self.i3_proxy.send_i3_command(f'move container to workspace "{next_workspace.name}"')
 
     def focus_new_workspace(self, group_context) -> None:
-        target_group = self._get_group_from_context(group_context)
-        local_number = self._find_free_local_number(target_group)
-        self.focus_workspace_number(group_context, local_number)
+        snapshot = self._snapshot()
+        target_group = self._get_group_from_context(group_context, snapshot)
+        local_number = self._find_free_local_number(target_group, snapshot)
+        self.focus_workspace_number(group_context, local_number, snapshot)
 
     def move_to_new_workspace(self, group_context) -> None:
-        target_group = self._get_group_from_context(group_context)
-        local_number = self._find_free_local_number(target_group)
-        self.move_to_workspace_number(group_context, local_number, False)
+        snapshot = self._snapshot()
+        target_group = self._get_group_from_context(group_context, snapshot)
+        local_number = self._find_free_local_number(target_group, snapshot)
+        self.move_to_workspace_number(group_context, local_number, False, snapshot)
 
     def update_focused_workspace(self,
                                  metadata_updates: ws_names.WorkspaceGroupingMetadata) -> None:
         if metadata_updates.group is not None and (not ws_names.is_valid_group_name(
                 metadata_updates.group)):
             raise WorkspaceGroupsError(f'Invalid group name provided: "{metadata_updates.group}"')
-        focused_workspace = self.get_tree().find_focused().workspace()
-        metadata = ws_names.parse_name(focused_workspace.name)
-        for section in ['group', 'local_number', 'static_name']:
-            value = getattr(metadata_updates, section)
-            if value is not None:
-                setattr(metadata, section, value)
+        snapshot = self._snapshot()
+        focused_workspace = snapshot.focused_workspace
+        # Only the fields that are set in the updates are replaced.
+        updated_fields = {}
+        if metadata_updates.group is not None:
+            updated_fields['group'] = metadata_updates.group
+        if metadata_updates.local_number is not None:
+            updated_fields['local_number'] = metadata_updates.local_number
+        if metadata_updates.static_name is not None:
+            updated_fields['static_name'] = metadata_updates.static_name
+        metadata = dataclasses.replace(ws_names.parse_name(focused_workspace.name),
+                                       **updated_fields)
         found_name, exists = self._get_workspace_by_local_number(metadata.group,
-                                                                 metadata.local_number)
+                                                                 metadata.local_number, snapshot)
         if exists and focused_workspace.name != found_name:
             if not self.config['workspace_moves']['use_next_available_number']:
                 raise WorkspaceGroupsError(f'Workspace with local number "{metadata.local_number}" '
                                            f'already exists in group: "{metadata.group}": '
                                            f'"{found_name}"')
-            group_to_all_workspaces = ws_names.get_group_to_workspaces(self.get_tree().workspaces())
             used_local_numbers = ws_names.get_used_local_numbers(
-                group_to_all_workspaces[metadata.group])
-            free_local_numbers = ws_names.get_lowest_free_local_numbers(1, used_local_numbers)
-            metadata.local_number = next(iter(free_local_numbers))
+                snapshot.group_to_all_workspaces[metadata.group])
+            metadata = dataclasses.replace(
+                metadata, local_number=ws_names.get_lowest_free_local_number(used_local_numbers))
         self.i3_proxy.rename_workspace(focused_workspace.name,
-                                       self._create_workspace_name(metadata))
+                                       self._create_workspace_name(metadata, snapshot))
@@ -0,0 +1,35 @@
+# Generated from default_config.toml by tools/gen-default-config, do not edit.
+# Importing the default config is much faster than parsing the TOML file.
+# yapf: disable
+DEFAULT_CONFIG = {'renumber_workspaces': False,
+ 'workspace_moves': {'use_next_available_number': False},
+ 'icons': {'enable': False,
+           'enable_all_groups': False,
+           'delimiter': '',
+           'prefix': '',
+           'suffix': '',
+           'min_duplicates_count': 3,
+           'default_icon': '',
+           'try_fallback_rules': True,
+           'rules': [{'property': 'class', 'match': 'kitty|Termite|URxvtc?', 'icon': '\ue795'},
+                     {'property': 'class', 'match': 'Chromium|Chrome', 'icon': '\ue743'},
+                     {'property': 'class', 'match': 'Firefox', 'icon': '\ue745'},
+                     {'property': 'class', 'match': 'copyq', 'icon': '\uf0ea'},
+                     {'property': 'class', 'match': 'Ranger', 'icon': '\ue5fe'},
+                     {'property': 'class', 'match': 'Rofi', 'icon': '\uf120'},
+                     {'property': 'class', 'match': 'Pqiv', 'icon': '\ue244'},
+                     {'property': 'class', 'match': 'Pinta', 'icon': '\ue22b'},
+                     {'property': 'class', 'match': '[Mm]pv', 'icon': '\uf008'},
+                     {'property': 'class', 'match': '[Vv]lc', 'icon': '嗢'},
+                     {'property': 'class', 'match': '[Ll]ibreoffice-writer', 'icon': '\uf1c2'},
+                     {'property': 'class', 'match': '[Ll]ibreoffice-calc', 'icon': '\uf1c3'},
+                     {'property': 'class', 'match': 'Peek', 'icon': '\uf03d'},
+                     {'property': 'class', 'match': 'ipython', 'icon': '\ue235'},
+                     {'property': 'class', 'match': 'python', 'icon': '\ue235'},
+                     {'property': 'class', 'match': 'jupyter-qtconsole', 'icon': '\ue235'},
+                     {'property': 'class', 'match': 'Gvim', 'icon': '\ue7c5'},
+                     {'property': 'class', 'match': 'settings', 'icon': '\uf013'},
+                     {'property': 'class', 'match': 'slack', 'icon': '聆'},
+                     {'property': 'class', 'match': 'Zathura', 'icon': '\uf725'},
+                     {'property': 'class', 'match': 'Telegram', 'icon': '\ue215'},
+                     {'property': 'class', 'match': 'Pavucontrol', 'icon': '墳'}]}}
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+import contextlib
+import logging
+from typing import Dict, Iterator, List, Optional
 
 import i3ipc
 
@@ -19,24 +21,52 @@ class I3Proxy:
         # Other operations like get_workspaces and get_outputs were about 50µs
         # using the same method, which is more negligible.
         self.tree = None
+        # Computed from the cached tree and outputs, so they're reset with the
+        # tree, see `_invalidate_cache`.
+        self._focused_monitor_name: Optional[str] = None
+        # Maps the active monitor names to their index, see
+        # `_get_monitor_to_index`.
+        self._monitor_to_index: Optional[Dict[str, int]] = None
+        # Commands queued while batching, see `batch`.
+        self._batched_commands: Optional[List[str]] = None
 
     def get_tree(self, cached: bool = True) -> i3ipc.Con:
         if self.tree and cached:
             return self.tree
+        self._invalidate_cache()
         self.tree = self.i3_connection.get_tree()
         return self.tree
 
+    # Commands sent to i3 may change its state, so the cached tree and the
+    # values computed from it are dropped and fetched again when needed.
+    def _invalidate_cache(self) -> None:
+        self.tree = None
+        self._focused_monitor_name = None
+        self._monitor_to_index = None
+
+    # Outputs are queried once, like the tree, since a command may need the
+    # index of the same monitors multiple times.
+    def _get_monitor_to_index(self) -> Dict[str, int]:
+        if self._monitor_to_index is None:
+            ordered_monitors = [
+                output for output in self.i3_connection.get_outputs() if output.active
+            ]
+            # Sort monitors from top to bottom, and from left to right.
+            ordered_monitors.sort(key=lambda m: (m.rect.y, m.rect.x))
+            self._monitor_to_index = {m.name: i for i, m in enumerate(ordered_monitors)}
+        return self._monitor_to_index
+
     def get_monitor_index(self, monitor_name):
-        ordered_monitors = [output for output in self.i3_connection.get_outputs() if output.active]
-        # Sort monitors from top to bottom, and from left to right.
-        ordered_monitors.sort(key=lambda m: (m.rect.y, m.rect.x))
-        return [m.name for m in ordered_monitors].index(monitor_name)
+        return self._get_monitor_to_index()[monitor_name]
 
     def get_focused_monitor_name(self) -> str:
-        con = self.get_tree().find_focused()
-        while con.type != 'output':
-            con = con.parent
-        return con.name
+        tree = self.get_tree()
+        if self._focused_monitor_name is None:
+            con = tree.find_focused()
+            while con.type != 'output':
+                con = con.parent
+            self._focused_monitor_name = con.name
+        return self._focused_monitor_name
 
     def get_monitor_workspaces(self, monitor_name: Optional[str] = None) -> List[i3ipc.Con]:
         if monitor_name is None:
@@ -44,30 +74,58 @@ class I3Proxy:
         return self.get_monitor_to_workspaces()[monitor_name]
 
     def get_monitor_to_workspaces(self) -> Dict[str, List[i3ipc.Con]]:
-        active_monitor_names = [
-            output.name for output in self.i3_connection.get_outputs() if output.active
-        ]
+        active_monitor_names = self._get_monitor_to_index()
         monitor_to_workspaces = {}
-        # We could do this more efficiently by assuming that the outputs are the
-        # direct children of the root, instead of scanning the whole tree to
-        # find them, but this should be negligible.
-        for con in self.get_tree():
-            if con.type == 'output' and con.name in active_monitor_names:
-                workspaces = [c for c in con if c.type == 'workspace']
-                monitor_to_workspaces[con.name] = workspaces
+        # Outputs are the direct children of the root, and their workspaces are
+        # the children of their content container, so only these two levels
+        # are scanned instead of the whole tree with all the windows.
+        for output in self.get_tree().nodes:
+            if output.type == 'output' and output.name in active_monitor_names:
+                monitor_to_workspaces[output.name] = [
+                    ws for con in output.nodes for ws in con.nodes if ws.type == 'workspace'
+                ]
         return monitor_to_workspaces
 
-    def send_i3_command(self, command: str) -> None:
-        if self.dry_run:
-            log_prefix = '[dry-run] would send'
-        else:
-            log_prefix = 'Sending'
-        logger.info("%s i3 command: '%s'", log_prefix, command)
-        if not self.dry_run:
-            reply = self.i3_connection.command(command)[0]
+    # Sends all the i3 commands issued in the context as a single message. i3
+    # accepts multiple commands separated by semicolons and runs them in order,
+    # so batching saves a round trip to i3 per command. Nested batches are
+    # merged into the outermost one.
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        if self._batched_commands is not None:
+            yield
+            return
+        self._batched_commands = []
+        try:
+            yield
+            commands = self._batched_commands
+        finally:
+            self._batched_commands = None
+        if commands and not self.dry_run:
+            self._run_i3_command('; '.join(commands))
+
+    def _run_i3_command(self, command: str) -> None:
+        self._invalidate_cache()
+        for reply in self.i3_connection.command(command):
             if not reply.success:
                 logger.warning('i3 command error: %s', reply.error)
 
+    def send_i3_command(self, command: str) -> None:
+        # Commands are sent for every workspace rename, so the log message is
+        # only built when it's going to be logged.
+        if logger.isEnabledFor(logging.INFO):
+            if self.dry_run:
+                log_prefix = '[dry-run] would send'
+            elif self._batched_commands is not None:
+                log_prefix = 'Batching'
+            else:
+                log_prefix = 'Sending'
+            logger.info("%s i3 command: '%s'", log_prefix, command)
+        if self._batched_commands is not None:
+            self._batched_commands.append(command)
+        elif not self.dry_run:
+            self._run_i3_command(command)
+
     def focus_workspace(self, name: str, auto_back_and_forth: bool = True) -> None:
         options = ''
         if not auto_back_and_forth:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import collections
+import functools
 import re
 from typing import Optional
 
@@ -17,13 +18,14 @@ class IconRule:
         self.matcher = re.compile(matcher)
         self.icon = icon
 
-    def match(self, window: i3ipc.Con) -> Optional[str]:
+    def match(self, window_class: Optional[str], window_instance: Optional[str],
+              window_title: Optional[str]) -> Optional[str]:
         if self.window_property == 'class':
-            property_value = window.window_class
+            property_value = window_class
         elif self.window_property == 'instance':
-            property_value = window.window_instance
+            property_value = window_instance
         else:
-            property_value = window.window_title
+            property_value = window_title
         # The value can be None for i3 placeholder windows and possibly others.
         if property_value and self.matcher.match(property_value):
             return self.icon
@@ -37,12 +39,24 @@ class IconsResolver:
         self.rules = []
         for rule in self.config.get('rules', []):
             self.rules.append(IconRule(rule['property'], rule['match'], rule['icon']))
+        # Matching a window against all the rules runs many regexes, and the
+        # same windows are matched on every update of the workspace names, so
+        # the icons are cached by the window properties the rules use.
+        self._get_properties_icon = functools.lru_cache(maxsize=512)(self._match_rules)
 
-    def get_window_icon(self, window: i3ipc.Con) -> str:
+    def _match_rules(self, window_class: Optional[str], window_instance: Optional[str],
+                     window_title: Optional[str]) -> Optional[str]:
         for rule in self.rules:
-            icon = rule.match(window)
+            icon = rule.match(window_class, window_instance, window_title)
             if icon is not None:
                 return icon
+        return None
+
+    def get_window_icon(self, window: i3ipc.Con) -> str:
+        icon = self._get_properties_icon(window.window_class, window.window_instance,
+                                         window.window_title)
+        if icon is not None:
+            return icon
         logger.info('No icon specified for window with class: "%s", instance: '
                     '"%s", title: "%s", name: "%s"', window.window_class, window.window_instance,
                     window.window_title, window.name)  # pyright: ignore[reportAttributeAccessIssue]
@@ -10,9 +10,11 @@ def main():
         raise ValueError('Usage: i3-workspace-groups-nc SOCKET')
     sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     sock.connect(sys.argv[1])
+    # The request is read from stdin as is, including its terminator.
     cmd = sys.stdin.buffer.read()
     sock.sendall(cmd)
-    output = sock.recv(100000)
+    # The server closes the connection after sending the full output.
+    output = b''.join(iter(lambda: sock.recv(4096), b''))
     print(output.decode('utf-8'))
 
 
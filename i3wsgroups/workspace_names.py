@@ -28,7 +28,9 @@
 #  "102:mygroup:mail:2"
 from __future__ import annotations
 
-import collections
+import dataclasses
+import functools
+import logging
 from typing import Dict, List, Optional, Set
 
 import i3ipc
@@ -64,20 +66,15 @@ class WorkspaceDisplayMetadata:
         return str(self.__dict__)
 
 
+# Frozen since parsed metadata is cached and shared, use dataclasses.replace to
+# create updated metadata.
+@dataclasses.dataclass(frozen=True)
 class WorkspaceGroupingMetadata:
-
-    # pylint: disable=too-many-arguments
-    def __init__(self,
-                 global_number: Optional[int] = None,
-                 group: Optional[str] = None,
-                 static_name: Optional[str] = None,
-                 dynamic_name: Optional[str] = None,
-                 local_number: Optional[int] = None):
-        self.global_number: Optional[int] = global_number
-        self.group: Optional[str] = group
-        self.static_name: Optional[str] = static_name
-        self.dynamic_name: Optional[str] = dynamic_name
-        self.local_number: Optional[int] = local_number
+    global_number: Optional[int] = None
+    group: Optional[str] = None
+    static_name: Optional[str] = None
+    dynamic_name: Optional[str] = None
+    local_number: Optional[int] = None
 
     def __str__(self):
         return str(self.__dict__)
@@ -123,25 +120,36 @@ def is_recognized_name_format(workspace_name: str) -> bool:
     return True
 
 
+# Workspace names are parsed many times when handling a single command or
+# event, so the results are cached. The returned metadata is frozen, so it can
+# be shared between callers.
+@functools.lru_cache(maxsize=512)
 def parse_name(workspace_name: str) -> WorkspaceGroupingMetadata:
-    result = WorkspaceGroupingMetadata(group='')
-    if not is_recognized_name_format(workspace_name):
-        result.static_name = sanitize_section_value(workspace_name)
-        return result
+    # The name is split and its global number is parsed once, both for checking
+    # that the name format is recognized and for extracting the sections.
     sections = workspace_name.split(SECTIONS_DELIM)
-    result.global_number = parse_global_number_section(sections[0])
-    if sections[1]:
-        result.group = maybe_remove_suffix_colons(sections[1])
-    result.static_name = maybe_remove_prefix_colons(sections[2])
-    result.dynamic_name = maybe_remove_prefix_colons(sections[3])
-    if not sections[4]:
-        return result
-    # Don't fail on local number parsing errors, just ignore it.
-    try:
-        result.local_number = int(maybe_remove_prefix_colons(sections[4]))
-    except ValueError:
-        pass
-    return result
+    global_number = None
+    is_recognized = len(sections) == len(WORKSPACE_NAME_SECTIONS)
+    if is_recognized:
+        try:
+            global_number = parse_global_number_section(sections[0])
+        except ValueError:
+            is_recognized = False
+    if not is_recognized:
+        return WorkspaceGroupingMetadata(group='',
+                                         static_name=sanitize_section_value(workspace_name))
+    local_number = None
+    if sections[4]:
+        # Don't fail on local number parsing errors, just ignore it.
+        try:
+            local_number = int(maybe_remove_prefix_colons(sections[4]))
+        except ValueError:
+            pass
+    return WorkspaceGroupingMetadata(global_number=global_number,
+                                     group=maybe_remove_suffix_colons(sections[1]),
+                                     static_name=maybe_remove_prefix_colons(sections[2]),
+                                     dynamic_name=maybe_remove_prefix_colons(sections[3]),
+                                     local_number=local_number)
 
 
 def get_local_workspace_number(workspace: i3ipc.Con) -> Optional[int]:
@@ -178,6 +186,11 @@ def get_lowest_free_local_numbers(num: int, used_local_numbers: Set[int]) -> Lis
     return local_numbers
 
 
+def get_lowest_free_local_number(used_local_numbers: Set[int]) -> int:
+    return next(local_number for local_number in range(1, _MAX_WORKSPACES_PER_GROUP)
+                if local_number not in used_local_numbers)
+
+
 def compute_local_numbers(monitor_workspaces: List[i3ipc.Con], all_workspaces: List[i3ipc.Con],
                           renumber_workspaces: bool) -> List[int]:
     monitor_workspace_ids = {
@@ -211,15 +224,16 @@ def create_name(ws_metadata: WorkspaceGroupingMetadata) -> str:
     assert ws_metadata.group is not None
     sections = [f'{ws_metadata.global_number}:', ws_metadata.group]
     need_prefix_colons = bool(ws_metadata.group)
-    for section in ['static_name', 'dynamic_name', 'local_number']:
-        value = getattr(ws_metadata, section)
+    # Names are created for every workspace when organizing them, so the
+    # sections are read directly and converted to strings when appended.
+    for value in (ws_metadata.static_name, ws_metadata.dynamic_name, ws_metadata.local_number):
         if not value:
-            value = ''
+            sections.append('')
         elif need_prefix_colons:
-            value = f':{value}'
+            sections.append(f':{value}')
         else:
             need_prefix_colons = True
-        sections.append(str(value))
+            sections.append(str(value))
     return SECTIONS_DELIM.join(sections)
 
 
@@ -240,17 +254,20 @@ def global_number_to_local_number(global_number: int) -> int:
 
 
 def get_group_to_workspaces(workspaces: List[i3ipc.Con]) -> GroupToWorkspaces:
-    group_to_workspaces = collections.OrderedDict()
+    # Dicts preserve insertion order, so groups are ordered by their first
+    # workspace.
+    # This runs for every workspace in every command, so the debug logging is
+    # only checked once.
+    log_parsed_names = logger.isEnabledFor(logging.DEBUG)
+    group_to_workspaces = {}
     for workspace in workspaces:
         ws_metadata = parse_name(workspace.name)  # pyright: ignore[reportAttributeAccessIssue]
-        group = ws_metadata.group
-        logger.debug(
-            'Workspace %s parsed as: %s',
-            workspace.name,  # pyright: ignore[reportAttributeAccessIssue]
-            ws_metadata)
-        if group not in group_to_workspaces:
-            group_to_workspaces[group] = []
-        group_to_workspaces[group].append(workspace)
+        if log_parsed_names:
+            logger.debug(
+                'Workspace %s parsed as: %s',
+                workspace.name,  # pyright: ignore[reportAttributeAccessIssue]
+                ws_metadata)
+        group_to_workspaces.setdefault(ws_metadata.group, []).append(workspace)
     return group_to_workspaces
 
 
@@ -264,6 +281,15 @@ def _is_reordered_workspace(name1, name2):
     return ws1_metadata.static_name == ws2_metadata.static_name
 
 
+def _get_workspaces_group_index(workspaces: List[i3ipc.Con]) -> Optional[int]:
+    for workspace in workspaces:
+        global_number = parse_name(
+            workspace.name).global_number  # pyright: ignore[reportAttributeAccessIssue]
+        if global_number is not None:
+            return global_number_to_group_index(global_number)
+    return None
+
+
 def get_group_index(target_group: str, group_to_workspaces: GroupToWorkspaces):
     # If there are existing workspaces in the group, use them to derive the
     # group index. Otherwise, use the smallest available group index.
@@ -271,15 +297,15 @@ def get_group_index(target_group: str, group_to_workspaces: GroupToWorkspaces):
     # in the group list, because there may have been a group that was
     # implicitly removed because it had a single empty workspace and the
     # user focused on another workspace.
-    group_to_index = {}
-    for group, workspaces in group_to_workspaces.items():
-        for workspace in workspaces:
-            parsed_name = parse_name(workspace.name)  # pyright: ignore[reportAttributeAccessIssue]
-            if parsed_name.global_number is not None:
-                group_to_index[group] = global_number_to_group_index(parsed_name.global_number)
-                break
-    if target_group in group_to_index:
-        return group_to_index[target_group]
-    if group_to_index:
-        return max(group_to_index.values()) + 1
+    # The target group is checked first, since then the other groups don't
+    # need to be scanned.
+    group_index = _get_workspaces_group_index(group_to_workspaces.get(target_group, []))
+    if group_index is not None:
+        return group_index
+    group_indices = [
+        index for index in map(_get_workspaces_group_index, group_to_workspaces.values())
+        if index is not None
+    ]
+    if group_indices:
+        return max(group_indices) + 1
     return 0
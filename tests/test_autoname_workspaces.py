@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+
+import i3ipc
+
+from i3wsgroups import autoname_workspaces
+from i3wsgroups.default_config import DEFAULT_CONFIG
+from tests import test_util
+
+
+def test_update_not_skipped_after_change_during_update():
+    i3_connection = test_util.create_i3_connection({'DP-1': [('1', True)]})
+    first_tree = i3_connection.get_tree.return_value
+    trees = []
+
+    # Returns the first tree once, and afterwards a tree in which a workspace
+    # was created. Workspaces are renamed in place, like i3 would do.
+    def get_tree():
+        if not trees:
+            trees.append(first_tree)
+        elif len(trees) == 1:
+            trees.append(
+                test_util.create_tree(
+                    {'DP-1': [(first_tree.workspaces()[0].name, True), ('2', False)]}))
+        return trees[-1]
+
+    i3_connection.get_tree.side_effect = get_tree
+    autonamer = autoname_workspaces.WorkspaceAutonamer(DEFAULT_CONFIG, i3_connection, dry_run=False)
+    autonamer.update_workspace_names(i3_connection)
+    i3_connection.get_tree.assert_called_once()
+    assert test_util.get_sent_commands(i3_connection)[0].startswith('rename workspace "1" to')
+    i3_connection.command.reset_mock()
+    autonamer.update_workspace_names(i3_connection)
+    assert i3_connection.get_tree.call_count == 2
+    assert test_util.get_sent_commands(i3_connection)[0].startswith('rename workspace "2" to')
+    # Nothing changed since the last update, so it's skipped.
+    i3_connection.command.reset_mock()
+    autonamer.update_workspace_names(i3_connection)
+    assert i3_connection.get_tree.call_count == 3
+    i3_connection.command.assert_not_called()
+
+
+def test_focus_event_updates_title_icons(monkeypatch):
+    monkeypatch.setattr(autoname_workspaces, '_UPDATE_DEBOUNCE_SECONDS', 0)
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    title_rule = {'property': 'title', 'match': 'vim', 'icon': 'V'}
+    config['icons'].update(enable=True, default_icon='D', rules=[title_rule])
+    i3_connection = test_util.create_i3_connection({'DP-1': [('1', True)]})
+    window = i3_connection.get_tree.return_value.leaves()[0]
+    window.window_title = 'zsh'
+    autonamer = autoname_workspaces.WorkspaceAutonamer(config, i3_connection, dry_run=False)
+
+    async def send_focus_event():
+        await autonamer.workspace_event_handler(None, i3ipc.WorkspaceEvent({'change': 'focus'},
+                                                                           None))
+        # Wait for the debounce timer and the update it starts.
+        await asyncio.sleep(0.01)
+        await asyncio.gather(*autonamer._update_tasks)  # pylint: disable=protected-access
+
+    asyncio.run(send_focus_event())
+    old_name = i3_connection.get_tree.return_value.workspaces()[0].name
+    assert 'D' in old_name
+    i3_connection.command.reset_mock()
+    # Only the title changed, which changes the icon.
+    window.window_title = 'vim'
+    asyncio.run(send_focus_event())
+    new_name = old_name.replace('D', 'V')
+    assert test_util.get_sent_commands(i3_connection) == [
+        f'rename workspace "{old_name}" to "{new_name}"'
+    ]
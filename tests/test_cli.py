@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+from i3wsgroups import cli
+from tests import test_util
+
+
+def test_polybar_hook_shows_local_numbers_once(capsys):
+    groups_controller = test_util.create_controller({
+        'DP-1': [(test_util.create_name('a', 2), False), (test_util.create_name('a', 3), False),
+                 (test_util.create_name('a', 3), True)],
+    })
+    cli._print_polybar_hook(  # pylint: disable=protected-access
+        groups_controller, argparse.Namespace(monitor=None, line_color='#ff9900'))
+    assert capsys.readouterr().out == '%{o#ff9900}%{+o}a:%{-o} 2 %{u#ff9900}%{+u} 3 %{-u}\n'
+
+
+def test_list_workspaces_json(monkeypatch):
+    # The default server address is derived from the display.
+    monkeypatch.setenv('DISPLAY', ':0')
+    groups_controller = test_util.create_controller({
+        'DP-1': [(test_util.create_name('a', 1), True), ('mail', False)],
+    })
+    args = cli._create_args_parser().parse_args(  # pylint: disable=protected-access
+        ['list-workspaces', '--json', '--fields', 'group,local_number,static_name,focused'])
+    output = cli._print_workspaces(groups_controller, args)  # pylint: disable=protected-access
+    # yapf: disable
+    assert json.loads(output) == [
+        {'group': 'a', 'local_number': 1, 'static_name': '', 'focused': 1},
+        {'group': '', 'local_number': None, 'static_name': 'mail', 'focused': 0},
+    ]
+    # yapf: enable
+    # Missing values are empty in the table output.
+    args.json = False
+    output = cli._print_workspaces(groups_controller, args)  # pylint: disable=protected-access
+    assert output == 'a\t1\t\t1\n\t\tmail\t0'
@@ -1,3 +1,6 @@
+import os
+import types
+
 import pytest
 
 from i3wsgroups import config
@@ -11,8 +14,33 @@ from i3wsgroups import config
     ({'a': []}, {}, {}),
     ({'a': 0}, {'b': 0}, {'a': 0, 'b': 0}),
     ({'a': {'aa': 0, 'ab': 0}}, {}, {'a': {'aa': 0, 'ab': 0}}),
+    ({'a': {'aa': {'aaa': 0}}}, {'a': {'ab': 1}}, {'a': {'aa': {'aaa': 0}, 'ab': 1}}),
+    (types.MappingProxyType({'a': types.MappingProxyType({'aa': 0}), 'b': ()}), {},
+     {'a': {'aa': 0}}),
 ])
 # yapf: enable
 def test_merge(merge_from, merge_into, result):
     config.merge_config(merge_from, merge_into)
     assert merge_into == result
+
+
+def test_get_config_with_defaults_reloads_modified_file(tmp_path):
+    path = tmp_path / 'config.toml'
+    path.write_text('renumber_workspaces = true\n')
+    loaded_config = config.get_config_with_defaults(str(path))
+    assert loaded_config['renumber_workspaces']
+    # Modifying the returned config must not affect the cached one.
+    loaded_config['icons']['enable'] = True
+    assert not config.get_config_with_defaults(str(path))['icons']['enable']
+    path.write_text('renumber_workspaces = false\n')
+    # Make sure the mtime changes even on file systems with a coarse mtime.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not config.get_config_with_defaults(str(path))['renumber_workspaces']
+
+
+def test_default_config_matches_toml_file():
+    # default_config.py is generated by tools/gen-default-config and must be
+    # regenerated whenever default_config.toml changes.
+    with open(config.DEFAULT_CONFIG_PATH, 'rb') as f:
+        assert config.DEFAULT_CONFIG == config.tomllib.load(f)
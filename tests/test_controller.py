@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from i3wsgroups import controller
+from i3wsgroups.workspace_names import WorkspaceGroupingMetadata
+from tests import test_util
+
+_create_controller = test_util.create_controller
+_create_name = test_util.create_name
+
+
+def _get_sent_commands(groups_controller: controller.WorkspaceGroupsController) -> list[str]:
+    return test_util.get_sent_commands(groups_controller.i3_proxy.i3_connection)
+
+
+def test_switch_active_group():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), True), (_create_name('b', 1, group_index=1), False)],
+        'DP-2': [(_create_name('b', 2, monitor_index=1), False)],
+    })
+    groups_controller.switch_active_group('b', focused_monitor_only=False)
+    b1 = _create_name('b', 1)
+    assert _get_sent_commands(groups_controller) == [
+        f'rename workspace "{_create_name("b", 1, group_index=1)}" to "{b1}"',
+        f'rename workspace "{_create_name("a", 1)}" to "{_create_name("a", 1, group_index=1)}"',
+        f'workspace --no-auto-back-and-forth "{b1}"',
+    ]
+
+
+def test_switch_active_group_new_workspace():
+    groups_controller = _create_controller({'DP-1': [(_create_name('a', 1), True)]})
+    groups_controller.switch_active_group('b', focused_monitor_only=True)
+    assert _get_sent_commands(groups_controller) == [
+        f'rename workspace "{_create_name("a", 1)}" to "{_create_name("a", 1, group_index=1)}"',
+        f'workspace --no-auto-back-and-forth "{_create_name("b", 1)}"',
+    ]
+
+
+def test_focus_workspace_number():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), True)],
+        'DP-2': [(_create_name('a', 2, monitor_index=1), False)],
+    })
+    groups_controller.focus_workspace_number(None, 2)
+    groups_controller.focus_workspace_number(None, 3)
+    assert _get_sent_commands(groups_controller) == [
+        f'workspace  "{_create_name("a", 2, monitor_index=1)}"',
+        f'workspace  "{_create_name("a", 3)}"',
+    ]
+
+
+def test_focus_workspace_relative():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), False), (_create_name('a', 2), True),
+                 (_create_name('b', 1, group_index=1), False)],
+    })
+    groups_controller.focus_workspace_relative(1)
+    assert _get_sent_commands(groups_controller) == [
+        f'workspace --no-auto-back-and-forth "{_create_name("a", 1)}"',
+    ]
+    # Only the workspaces in all monitors are needed, so the focused monitor's
+    # workspaces aren't looked up.
+    groups_controller.i3_proxy.i3_connection.get_outputs.assert_not_called()
+
+
+def test_update_focused_workspace():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), True), (_create_name('b', 1, group_index=1), False)],
+    })
+    groups_controller.update_focused_workspace(WorkspaceGroupingMetadata(group='b', local_number=2))
+    new_name = _create_name('b', 2, group_index=1)
+    assert _get_sent_commands(groups_controller) == [
+        f'rename workspace "{_create_name("a", 1)}" to "{new_name}"',
+    ]
+
+
+def test_list_workspaces():
+    names = [_create_name('a', 1), _create_name('b', 1, group_index=1), _create_name('a', 2)]
+    groups_controller = _create_controller({'DP-1': [(name, False) for name in names]})
+    workspaces = groups_controller.list_workspaces(None)
+    assert [ws.name for ws in workspaces] == [names[0], names[2], names[1]]
+
+
+def test_organize_workspace_groups_batches_renames():
+    names = [_create_name('a', 1), _create_name('b', 1, group_index=1)]
+    groups_controller = _create_controller({'DP-1': [(names[0], True), (names[1], False)]})
+    workspaces = groups_controller.get_tree().workspaces()
+    groups_controller.organize_workspace_groups([('b', [workspaces[1]]), ('a', [workspaces[0]])])
+    groups_controller.i3_proxy.i3_connection.command.assert_called_once_with(
+        f'rename workspace "{names[1]}" to "{_create_name("b", 1)}"; '
+        f'rename workspace "{names[0]}" to "{_create_name("a", 1, group_index=1)}"')
+
+
+def test_switch_active_group_sends_single_command():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), True), (_create_name('b', 1, group_index=1), False)],
+        'DP-2': [(_create_name('a', 2, monitor_index=1), False),
+                 (_create_name('b', 2, monitor_index=1, group_index=1), False)],
+    })
+    groups_controller.switch_active_group('b', focused_monitor_only=False)
+    groups_controller.i3_proxy.i3_connection.command.assert_called_once()
+    assert len(_get_sent_commands(groups_controller)) == 5
+
+
+def test_list_workspaces_focused_only():
+    names = [_create_name('a', 1), _create_name('b', 1, group_index=1)]
+    groups_controller = _create_controller({'DP-1': [(names[0], False), (names[1], True)]})
+    workspaces = groups_controller.list_workspaces(None, focused_only=True)
+    assert [ws.name for ws in workspaces] == [names[1]]
+    workspaces = groups_controller.list_workspaces(controller.NamedGroupContext('b'),
+                                                   focused_only=True)
+    assert [ws.name for ws in workspaces] == [names[1]]
+    assert not groups_controller.list_workspaces(controller.ActiveGroupContext(), focused_only=True)
+
+
+def test_list_groups():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), True), (_create_name('b', 1, group_index=1), False),
+                 (_create_name('a', 2), False)],
+        'DP-2': [(_create_name('c', 1, monitor_index=1), False)],
+    })
+    assert groups_controller.list_groups() == ['a', 'b', 'c']
+    assert groups_controller.list_groups(monitor_only=True) == ['a', 'b']
+
+
+def test_get_monitor_to_workspaces():
+    groups_controller = _create_controller({
+        'DP-1': [(_create_name('a', 1), True), (_create_name('a', 2), False)],
+        'DP-2': [(_create_name('a', 3, monitor_index=1), False)],
+    })
+    monitor_to_workspaces = groups_controller.i3_proxy.get_monitor_to_workspaces()
+    monitor_to_names = {m: [ws.name for ws in wss] for m, wss in monitor_to_workspaces.items()}
+    assert monitor_to_names == {
+        'DP-1': [_create_name('a', 1), _create_name('a', 2)],
+        'DP-2': [_create_name('a', 3, monitor_index=1)],
+    }
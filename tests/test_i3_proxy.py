@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import unittest.mock
+
+import i3ipc
+import pytest
+
+from i3wsgroups import i3_proxy
+
+
+def _create_proxy() -> i3_proxy.I3Proxy:
+    i3_connection = unittest.mock.create_autospec(i3ipc.Connection)
+    i3_connection.command.return_value = []
+    return i3_proxy.I3Proxy(i3_connection, dry_run=False)
+
+
+def test_batch_sends_single_command():
+    proxy = _create_proxy()
+    with proxy.batch():
+        proxy.rename_workspace('1', '2')
+        with proxy.batch():
+            proxy.focus_workspace('2')
+        proxy.i3_connection.command.assert_not_called()
+    proxy.i3_connection.command.assert_called_once_with(
+        'rename workspace "1" to "2"; workspace  "2"')
+
+
+def test_batch_not_sent_on_error():
+    proxy = _create_proxy()
+    with pytest.raises(ValueError), proxy.batch():
+        proxy.rename_workspace('1', '2')
+        raise ValueError()
+    proxy.i3_connection.command.assert_not_called()
+    proxy.rename_workspace('1', '2')
+    proxy.i3_connection.command.assert_called_once_with('rename workspace "1" to "2"')
+
+
+def _create_output(name: str, x: int, y: int, active: bool = True):
+    output = unittest.mock.Mock(active=active, rect=unittest.mock.Mock(x=x, y=y))
+    output.name = name
+    return output
+
+
+def test_get_monitor_index():
+    proxy = _create_proxy()
+    proxy.i3_connection.get_outputs.return_value = [
+        _create_output('right', 100, 0),
+        _create_output('inactive', 0, 0, active=False),
+        _create_output('left', 0, 0),
+        _create_output('bottom', 0, 100),
+    ]
+    assert proxy.get_monitor_index('left') == 0
+    assert proxy.get_monitor_index('right') == 1
+    assert proxy.get_monitor_index('bottom') == 2
+    proxy.i3_connection.get_outputs.assert_called_once()
+    proxy.get_tree(cached=False)
+    assert proxy.get_monitor_index('left') == 0
+    assert proxy.i3_connection.get_outputs.call_count == 2
+
+
+def test_command_invalidates_tree():
+    proxy = _create_proxy()
+    tree = proxy.get_tree()
+    assert proxy.get_tree() is tree
+    proxy.i3_connection.get_tree.assert_called_once()
+    with proxy.batch():
+        proxy.focus_workspace('1')
+        proxy.get_tree()
+    proxy.i3_connection.get_tree.assert_called_once()
+    proxy.get_tree()
+    assert proxy.i3_connection.get_tree.call_count == 2
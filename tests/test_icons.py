@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import unittest.mock
+
+from i3wsgroups import icons
+
+# yapf: disable
+_RULES = [
+    {'property': 'class', 'match': 'Firefox', 'icon': 'F'},
+    {'property': 'title', 'match': 'vim', 'icon': 'V'},
+]
+# yapf: enable
+_CONFIG = {'delimiter': '|', 'min_duplicates_count': 3, 'default_icon': 'D', 'rules': _RULES}
+
+
+def _create_window(window_class, window_title=''):
+    return unittest.mock.Mock(window_class=window_class,
+                              window_instance=None,
+                              window_title=window_title)
+
+
+def test_get_window_icon():
+    resolver = icons.IconsResolver(_CONFIG)
+    assert resolver.get_window_icon(_create_window('Firefox')) == 'F'
+    assert resolver.get_window_icon(_create_window('kitty', 'vim foo')) == 'V'
+    assert resolver.get_window_icon(_create_window('kitty', 'zsh')) == 'D'
+    # The cached icons depend on all the properties used by the rules.
+    assert resolver.get_window_icon(_create_window('kitty', 'vim bar')) == 'V'
+    assert resolver.get_window_icon(_create_window('kitty', 'zsh')) == 'D'
+
+
+def test_get_workspace_icons():
+    resolver = icons.IconsResolver(_CONFIG)
+    workspace = unittest.mock.Mock()
+    workspace.leaves.return_value = [_create_window('Firefox')] * 3 + [_create_window('a')] * 2
+    assert resolver.get_workspace_icons(workspace) == '3xF|D|D'
@@ -21,7 +21,7 @@ def main():
                            os.environ['DISPLAY'].replace(':', '')))
     sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     sock.connect(socket_path)
-    sock.sendall('\n'.join(sys.argv[1:]).encode('utf-8'))
+    sock.sendall('\n'.join(sys.argv[1:]).encode('utf-8') + b'\0')
     output = sock.recv(100000).decode('utf-8')
     print(output)
     if output.startswith('error:'):
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import dataclasses
+import itertools
 import unittest.mock
 
 import i3ipc
 
 from i3wsgroups import workspace_names
+from i3wsgroups.controller import WorkspaceGroupsController
+from i3wsgroups.default_config import DEFAULT_CONFIG
+from i3wsgroups.i3_proxy import I3Proxy
+
+_RECT = {'x': 0, 'y': 0, 'width': 100, 'height': 100}
+_ids = itertools.count(1)
 
 
 def create_workspace(workspace_id: int,
@@ -12,6 +20,73 @@ def create_workspace(workspace_id: int,
     workspace = unittest.mock.create_autospec(i3ipc.Con)
     workspace.id = workspace_id
     if ws_metadata.group is None:
-        ws_metadata.group = ''
+        ws_metadata = dataclasses.replace(ws_metadata, group='')
     workspace.name = workspace_names.create_name(ws_metadata)
     return workspace
+
+
+def create_name(group: str, local_number: int, monitor_index: int = 0, group_index: int = 0):
+    return workspace_names.create_name(
+        workspace_names.WorkspaceGroupingMetadata(
+            global_number=workspace_names.compute_global_number(monitor_index, group_index,
+                                                                local_number),
+            group=group,
+            local_number=local_number))
+
+
+def _create_con_data(con_type: str, name: str = '', nodes=(), focused: bool = False) -> dict:
+    return {
+        'id': next(_ids),
+        'type': con_type,
+        'name': name,
+        'focused': focused,
+        'nodes': list(nodes),
+        'rect': _RECT,
+        'window_rect': _RECT,
+        'deco_rect': _RECT,
+        'geometry': _RECT,
+    }
+
+
+# Creates an i3 tree with the given monitors, each having a list of
+# (workspace name, is focused) pairs.
+def create_tree(monitors: dict[str, list[tuple[str, bool]]]) -> i3ipc.Con:
+    outputs_data = []
+    for monitor, workspaces in monitors.items():
+        workspaces_data = []
+        for name, focused in workspaces:
+            # The focused container is a window inside the workspace.
+            windows = [_create_con_data('con', focused=True)] if focused else []
+            workspaces_data.append(_create_con_data('workspace', name, windows))
+        # Like in i3, the workspaces are in the content container of the output.
+        content = _create_con_data('con', 'content', workspaces_data)
+        outputs_data.append(_create_con_data('output', monitor, [content]))
+    return i3ipc.Con(_create_con_data('root', nodes=outputs_data), None, None)
+
+
+# Creates a mock i3 connection that returns the tree of the given monitors,
+# with the monitors ordered from left to right.
+def create_i3_connection(monitors: dict[str, list[tuple[str, bool]]]) -> i3ipc.Connection:
+    outputs = []
+    for i, monitor in enumerate(monitors):
+        output = unittest.mock.Mock(active=True, rect=unittest.mock.Mock(x=i * 100, y=0))
+        output.name = monitor
+        outputs.append(output)
+    i3_connection = unittest.mock.create_autospec(i3ipc.Connection)
+    i3_connection.get_tree.return_value = create_tree(monitors)
+    i3_connection.get_outputs.return_value = outputs
+    i3_connection.command.return_value = []
+    return i3_connection
+
+
+def create_controller(monitors: dict[str, list[tuple[str, bool]]],
+                      config=None) -> WorkspaceGroupsController:
+    return WorkspaceGroupsController(I3Proxy(create_i3_connection(monitors), dry_run=False),
+                                     config or DEFAULT_CONFIG)
+
+
+def get_sent_commands(i3_connection: i3ipc.Connection) -> list[str]:
+    commands = []
+    for call in i3_connection.command.call_args_list:
+        commands.extend(call.args[0].split('; '))
+    return commands
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import dataclasses
+
+import pytest
+
 from i3wsgroups.workspace_names import compute_global_number
 from i3wsgroups.workspace_names import compute_local_numbers
+from i3wsgroups.workspace_names import create_name
 from i3wsgroups.workspace_names import get_group_index
+from i3wsgroups.workspace_names import get_lowest_free_local_number
 from i3wsgroups.workspace_names import global_number_to_group_index
 from i3wsgroups.workspace_names import global_number_to_local_number
+from i3wsgroups.workspace_names import parse_name
+from i3wsgroups.workspace_names import SECTIONS_DELIM
 from i3wsgroups.workspace_names import WorkspaceGroupingMetadata
 from tests import test_util
 
@@ -29,6 +37,42 @@ def test_global_number_to_local_number():
     assert global_number_to_local_number(10205) == 5
 
 
+def test_get_lowest_free_local_number():
+    assert get_lowest_free_local_number(set()) == 1
+    assert get_lowest_free_local_number({1, 2, 4}) == 3
+
+
+def test_parse_name():
+    name = create_name(
+        WorkspaceGroupingMetadata(global_number=102,
+                                  group='mygroup',
+                                  static_name='mail',
+                                  local_number=2))
+    ws_metadata = parse_name(name)
+    assert ws_metadata.global_number == 102
+    assert ws_metadata.group == 'mygroup'
+    assert ws_metadata.static_name == 'mail'
+    assert ws_metadata.local_number == 2
+    assert parse_name(name) is ws_metadata
+    # The parsed metadata is cached, so it can't be modified.
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        ws_metadata.group = 'other'  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_parse_name_unrecognized_format():
+    ws_metadata = parse_name('mail')
+    assert ws_metadata.global_number is None
+    assert ws_metadata.group == ''
+    assert ws_metadata.static_name == 'mail'
+    assert ws_metadata.local_number is None
+    # The name has the right sections, but an invalid global number.
+    name = SECTIONS_DELIM.join(['x:', 'mygroup', ':mail', '', ':2'])
+    ws_metadata = parse_name(name)
+    assert ws_metadata.global_number is None
+    assert ws_metadata.group == ''
+    assert ws_metadata.static_name == name.replace(SECTIONS_DELIM, '%')
+
+
 def test_compute_local_numbers1():
     monitor_workspaces = [
         test_util.create_workspace(1, WorkspaceGroupingMetadata(global_number=1, local_number=1))